@@ -84,13 +84,29 @@ Deviations from the official calculations in VDI 2067:
 
 import os
 import logging
+import functools
+import importlib.util
 import math
-import locale
+import numpy as np
 import pandas as pd
 
+# Fast Excel reader, used if installed and supported (pandas >= 2.2)
+if (importlib.util.find_spec('python_calamine') is not None
+        and tuple(map(int, pd.__version__.split('.')[:2])) >= (2, 2)):
+    _EXCEL_ENGINE = 'calamine'
+else:  # calamine is optional, fall back to pandas' default
+    _EXCEL_ENGINE = None
+
 # Define the logging function
 logger = logging.getLogger(__name__)
 
+# Numeric properties of a part. The energy system stores them as arrays
+_PART_FIELDS = ('A_0', 'T_N', 'f_Inst', 'f_W_Insp', 'f_Op', 'fund')
+# Results of the annuity calculation of a part, stored the same way
+_RESULT_FIELDS = ('n', 'R_W', 'A_N_K', 'A_N_B')
+# Factors of the last calculation of capital-related costs, used for Part.A
+_FACTOR_FIELDS = ('q', 'r_K')
+
 
 def main_VDI_example(pprint=True):
     """Run the main VDI example.
@@ -240,15 +256,32 @@ class System():
 
     Add ``Part`` objects to the energy system to be able to perform the
     economic calculation with ``calc_annuities()``.
+
+    Args:
+        verbose (bool, optional): If false, the ``pprint_*()`` methods
+        only return their results without formatting and printing them,
+        e.g. to speed up batch runs. Default is True.
     """
 
-    def __init__(self):
+    def __init__(self, verbose=True):
+        self.verbose = verbose  # If False, pprint_*() methods print nothing
         self.cost_db = None  # Cost database; set by load_cost_db()
+        self._cost_dict = None  # Flat index of cost_db; see _get_entry_db()
+        self._cost_dict_db = None  # The cost_db that _cost_dict is built from
         self.factors = None  # Constant factors; set by load_cost_db()
         self.parts = []  # List of part objects in system; set by add_parts()
+        # Struct-of-arrays with the part properties and results. The arrays
+        # are buffers that grow geometrically; see add_part() and _array()
+        self._data = {field: np.full(0, np.nan) for field
+                      in _PART_FIELDS + _RESULT_FIELDS + _FACTOR_FIELDS}
+        self._n_parts = 0  # Number of used entries in the arrays
+        self._parts_synced = []  # Parts in the arrays; see _sync_parts()
+        self._df_parts = None  # Cached result of list_parts(); None if dirty
+        self._df_results_stale = False  # If the results in _df_parts are old
         self.A = None  # Total annuity of the system; set by calc_annuities()
         self.T = 0  # observation period; set in calc_annuities()
         self.q = 1  # observation factor; set in calc_annuities()
+        self.a = 1  # annuity factor; set in calc_annuities()
         self.df_VSE = pd.DataFrame()  # demand, other, proc.; calc_annuities()
         self.A_N_K_name = 'Capital-related costs'
         self.A_N_B_name = 'Operation-related costs'
@@ -266,6 +299,7 @@ class System():
             db_f_maintain='Instandsetzung',  # Effort for maintenance
             db_f_service='Wartung',  # Effort for servicing and inspection
             db_f_operation='Bedienen',  # Effort for operation
+            cache=False,
             ):
         """Load a database with cost information.
 
@@ -279,19 +313,35 @@ class System():
         For maximum flexibility in use (e.g. different languages),
         the names of the column headers can be given as input arguments.
 
+        The Excel file is read with ``python-calamine`` if it is installed,
+        which is much faster than the default ``openpyxl``. The loaded
+        database is kept in memory and shared by all ``System`` objects
+        loading the same unchanged file, so it should not be modified.
+
         Args:
-            path (str): Path to a compatible Excel file
+            path (str): Path to a compatible Excel file, or a file-like
+            object (which is never cached)
 
             sheet_regressions (str): Name of target sheet in Excel file
 
             db_* (str): Definitions of the used column names
 
+            cache (bool, optional): If true, the parsed sheet is stored in a
+            Parquet file next to the Excel file. It is loaded from there
+            instead, as long as it is newer than the Excel file. Reading
+            Excel files is slow, Parquet files are much faster. Requires
+            ``pyarrow`` and write access to the folder of the Excel file,
+            otherwise the Excel file is always read. Default is False.
+
         Returns:
             db (DataFrame): A DataFrame representation of the loaded database
 
         """
-        db = pd.read_excel(path, sheet_name=sheet_regressions,
-                           index_col=[0, 1, 2], header=0)
+        if isinstance(path, (str, os.PathLike)):
+            db = _read_cost_db(os.fspath(path), sheet_regressions,
+                               os.path.getmtime(path), cache)
+        else:  # File-like objects are read directly, without caching
+            db = _read_excel_db(path, sheet_regressions)
         self.cost_db = db
 
         # Definition of the column header names used in add_part_db()
@@ -304,6 +354,8 @@ class System():
         self.db_f_maintain = db_f_maintain  # Effort for maintenance
         self.db_f_service = db_f_service  # Effort for servicing and inspection
         self.db_f_operation = db_f_operation  # Effort for operation
+        # The memoized db may be the same object with other column names
+        self._cost_dict_db = None  # Rebuild the flat index in add_part_db()
 
         return db
 
@@ -340,14 +392,108 @@ class System():
         Returns:
             True (parts are added to ``self.parts``)
         """
+        part_tuple = (technology, variant, component)
+        entry = self._get_entry_db(part_tuple, size, raise_error)
+        if entry is None:
+            return False
+
+        (unit,  # Reference unit name
+         a, b,  # Factor and exponent of regression a*x^b
+         T_N,  # service life (in years)
+         f_Inst,  # Effort for maintenance
+         f_W_Insp,  # Effort for servicing and inspection
+         f_Op,  # Effort for operation [h/a]
+         ) = entry
+
+        if size > 0:
+            A_0 = a * size**(b+1)  # Investment amount [€]
+
+        else:  # Allows placeholder parts that have no actual costs
+            A_0 = 0
+            f_Op = 0
+
+        part_str = ', '.join(part_tuple)
+        self.add_part(part_str, A_0, T_N, f_Inst, f_W_Insp, f_Op, fund=fund,
+                      size=size, unit=unit)
+        return True
+
+    def add_parts_db(self, records, fund=0, raise_error=True):
+        """Add multiple ``Part`` objects from the cost database at once.
+
+        Same as calling ``add_part_db()`` for each record, but the
+        investment costs of all parts are calculated at once.
+
+        Args:
+            records (iterable): Tuples ``(technology, variant, component,
+            size)`` or ``(technology, variant, component, size, fund)``
+            describing the parts
+
+            fund (float, optional): Factor for funding of investment amount in
+            first year, used for all records without their own ``fund``
+
+            raise_error (bool, optional): If true, an error is raised if a
+            part is not found. Otherwise the error is only logged and the
+            part is skipped.
+
+        Returns:
+            True if all parts were added, otherwise False
+        """
+        found = []  # Records and database entries of all found parts
+        n_records = 0
+        for technology, variant, component, size, *fund_part in records:
+            n_records += 1
+            part_tuple = (technology, variant, component)
+            entry = self._get_entry_db(part_tuple, size, raise_error)
+            if entry is not None:
+                fund_part = fund_part[0] if fund_part else fund
+                found.append((part_tuple, size, fund_part, entry))
+
+        if len(found) == 0:
+            return n_records == 0
+
+        # Investment amounts [€] of all parts with regression a*x^b*x
+        size = np.array([record[1] for record in found], dtype=float)
+        a = np.array([record[3][1] for record in found], dtype=float)
+        b = np.array([record[3][2] for record in found], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            A_0 = np.where(size > 0, a * np.power(size, b+1), 0)
+
+        for (part_tuple, size_i, fund_i, entry), A_0_i in zip(found,
+                                                              A_0.tolist()):
+            unit, _, _, T_N, f_Inst, f_W_Insp, f_Op = entry
+            if size_i <= 0:  # Allows placeholder parts without actual costs
+                A_0_i = 0
+                f_Op = 0
+            self.add_part(', '.join(part_tuple), A_0_i, T_N, f_Inst,
+                          f_W_Insp, f_Op, fund=fund_i, size=size_i, unit=unit)
+        return len(found) == n_records
+
+    def _get_entry_db(self, part_tuple, size, raise_error=True):
+        """Look up a part in the cost database and check the given size.
+
+        Used by ``add_part_db()`` and ``add_parts_db()``.
+
+        Returns:
+            entry (tuple): ``(unit, a, b, T_N, f_Inst, f_W_Insp, f_Op)``,
+            or None if the part was not found and ``raise_error`` is false
+        """
         # Savety check
         if self.cost_db is None:
             self.load_cost_db()
 
-        # Determine invest amount
-        part_tuple = (technology, variant, component)
+        if self._cost_dict_db is not self.cost_db:
+            # Flat index for fast lookups, rebuilt if cost_db was replaced
+            columns = [self.db_unit, self.db_reg_factor, self.db_reg_exp,
+                       self.db_valid_min, self.db_valid_max, self.db_n_years,
+                       self.db_f_maintain, self.db_f_service,
+                       self.db_f_operation]
+            self._cost_dict = dict(zip(
+                self.cost_db.index,
+                self.cost_db[columns].itertuples(index=False, name=None)))
+            self._cost_dict_db = self.cost_db
+
         try:
-            df = self.cost_db.loc[part_tuple]
+            entry = self._cost_dict[part_tuple]
         except KeyError as ex:
             if raise_error:
                 if logger.isEnabledFor(logging.DEBUG):
@@ -356,35 +502,22 @@ class System():
                                  .format(part_tuple)) from ex
             else:
                 logger.error('%s not found in index of database', part_tuple)
-                return False
-
-        a = df[self.db_reg_factor]
-        b = df[self.db_reg_exp]
-        if 0 < size < df[self.db_valid_min]:
-            logger.warning('Size of part %s is below boundary: %s<%s %s',
-                           part_tuple, size, df['Gültig min'],
-                           df['Bezugseinheit'])
-        elif size > df[self.db_valid_max]:
-            logger.warning('Size of part %s is above boundary: %s<%s %s',
-                           part_tuple, size, df['Gültig max'],
-                           df['Bezugseinheit'])
-
-        if size > 0:
-            A_0 = a * pow(size, b) * size  # Investment amount [€]
-            f_Op = df[self.db_f_operation]  # Effort for operation [h/a]
+                return None
 
-        else:  # Allows placeholder parts that have no actual costs
-            A_0 = 0
-            f_Op = 0
+        (unit,  # Reference unit name
+         a, b,  # Factor and exponent of regression a*x^b
+         valid_min, valid_max,  # Validity of regression
+         *properties,  # Service life and efforts
+         ) = entry
 
-        T_N = df[self.db_n_years]  # service life (in years)
-        f_Inst = df[self.db_f_maintain]  # Effort for maintenance
-        f_W_Insp = df[self.db_f_service]  # Effort for servicing and inspection
+        if 0 < size < valid_min:
+            logger.warning('Size of part %s is below boundary: %s<%s %s',
+                           part_tuple, size, valid_min, unit)
+        elif size > valid_max:
+            logger.warning('Size of part %s is above boundary: %s>%s %s',
+                           part_tuple, size, valid_max, unit)
 
-        part_str = ', '.join(part_tuple)
-        self.add_part(part_str, A_0, T_N, f_Inst, f_W_Insp, f_Op, fund=fund,
-                      size=size, unit=df[self.db_unit])
-        return True
+        return (unit, a, b, *properties)
 
     def add_part(self, name, A_0, T_N, f_Inst, f_W_Insp, f_Op, fund=0,
                  size=None, unit=None):
@@ -421,6 +554,54 @@ class System():
         new_part = Part(name, A_0, T_N, f_Inst, f_W_Insp, f_Op, fund=fund,
                         size=size, unit=unit)
         self.parts.append(new_part)
+        self._parts_synced.append(new_part)
+
+        # Keep the struct-of-arrays used by calc_annuities() in sync
+        i = self._n_parts
+        if i == len(self._data['A_0']):  # Buffers are full, double their size
+            for field, buffer in self._data.items():
+                self._data[field] = np.full(max(8, 2*i), np.nan)
+                self._data[field][:i] = buffer
+        for field, value in zip(_PART_FIELDS,
+                                (A_0, T_N, f_Inst, f_W_Insp, f_Op, fund)):
+            self._data[field][i] = value
+        new_part._system = self  # From now on, the part is a view
+        new_part._index = i  # into the arrays, see _PartField
+        self._n_parts += 1
+        self._df_parts = None  # Mark the cached list of parts as dirty
+
+    def _sync_parts(self):
+        """Rebuild the struct-of-arrays if ``self.parts`` was changed directly.
+
+        ``self.parts`` is the source of truth. Parts may be appended to or
+        removed from the list directly, which is detected here before the
+        arrays are used. Changes to the properties of the parts, e.g.
+        ``sys.parts[0].A_0 = 5000``, are written to the arrays immediately.
+        """
+        if self.parts == self._parts_synced:  # Compares the identities
+            return
+
+        fields = _PART_FIELDS + _RESULT_FIELDS + _FACTOR_FIELDS
+        values = {field: [getattr(_part, field) for _part in self.parts]
+                  for field in fields}
+        for _part in self._parts_synced:  # Includes the removed parts
+            if _part._system is self:
+                _part._detach()
+        for field in fields:
+            self._data[field] = np.array(values[field], dtype=float)
+        for i, _part in enumerate(self.parts):
+            _part._system = self
+            _part._index = i
+        self._n_parts = len(self.parts)
+        self._parts_synced = list(self.parts)
+        self._df_parts = None  # Mark the cached list of parts as dirty
+
+    def _array(self, field):
+        """Return a view of the array of a field of all parts in the system.
+
+        ``field`` is one of ``_PART_FIELDS`` or ``_RESULT_FIELDS``.
+        """
+        return self._data[field][:self._n_parts]
 
     def list_parts(self, idx_number='Nr.', idx_name='Name'):
         """Return a list of all parts in the energy system.
@@ -428,6 +609,11 @@ class System():
         Combine properties and all calculated values from the parts of
         the energy system into one DataFrame.
 
+        The DataFrame is cached until the parts are changed, and only the
+        results are updated after ``calc_annuities()``, so repeated calls
+        are cheap. A copy of the cache is returned, which is not changed
+        by later calculations.
+
         Args:
             idx_number (str): Name given to the first index level of df
 
@@ -437,22 +623,39 @@ class System():
             df (DataFrame): A DataFrame with a list of all components
 
         """
-        s_list = []
-        for _part in self.parts:
-            s = pd.Series(_part.__dict__)
-            s_list.append(s)
-
-        if len(s_list) > 0:  # Normal use (the system contains parts)
-            df = pd.concat(s_list, axis=1).T
-
-        else:  # No parts: Create an empty DataFrame with the correct columns
-            fake_part = Part('Empty', 0, 0, 0, 0, 0, 0)  # create empty part
-            df = pd.concat([pd.Series(fake_part.__dict__)], axis=1).T
-            df.drop(0, inplace=True)  # Remove the row
+        self._sync_parts()
+        if (self._df_parts is not None
+                and self._df_parts.index.names == [idx_number, idx_name]):
+            if self._df_results_stale:
+                self._fill_results(self._df_parts)
+                self._df_results_stale = False
+            return self._df_parts.copy()
+
+        df = pd.DataFrame({'name': [_part.name for _part in self.parts],
+                           'size': [_part.size for _part in self.parts],
+                           'unit': [_part.unit for _part in self.parts]})
+        for field in _PART_FIELDS:
+            df[field] = self._array(field)
+        self._fill_results(df)
 
         df.set_index(keys='name', append=True, inplace=True)
         df.index.set_names([idx_number, idx_name], inplace=True)
-        return df
+        self._df_parts = df
+        self._df_results_stale = False
+        return df.copy()
+
+    def _fill_results(self, df):
+        """Write the calculated results of all parts into the columns of df.
+
+        Used by ``list_parts()`` and to update its cached DataFrame with the
+        results of the latest calculation, without rebuilding it.
+        """
+        df['A'] = [_part.A for _part in self.parts]
+        for field in _RESULT_FIELDS:
+            df[field] = self._array(field)
+        # The number of replacements is an integer, but missing before
+        # calc_annuities() was called
+        df['n'] = df['n'].astype('Int64')
 
     def calc_investment(self, include_funding=False):
         """Calculate the total investment cost.
@@ -465,11 +668,12 @@ class System():
         Returns:
             A_0_sum (float): Investment cost of all parts
         """
-        df_parts = self.list_parts()  # Get DataFrame with all parts
-        A_0_sum = df_parts['A_0'].sum()  # Return sum of all investment costs
+        self._sync_parts()
+        A_0 = self._array('A_0')
+        A_0_sum = A_0.sum()  # Return sum of all investment costs
 
         if include_funding:
-            A_0_sum = (df_parts['A_0']*(1-df_parts['fund'])).sum()
+            A_0_sum = (A_0*(1-self._array('fund'))).sum()
 
         return A_0_sum
 
@@ -499,6 +703,7 @@ class System():
                        df_VSE=pd.DataFrame(),
                        A_N_K_name='Capital-related costs',
                        A_N_B_name='Operation-related costs',
+                       return_array=False,
                        ):
         """Calculate the indiviual annuities of total annual payments.
 
@@ -553,7 +758,14 @@ class System():
             If ``None``, skip output of capital-related costs.
 
             A_N_B_name (str, optional): Name for 'Operation-related costs'
-            If ``None``, skip output of operation-related costs.
+            If ``None``, skip output of operation-related costs. Both
+            names must not be used in index level 0 of ``df_VSE``.
+
+            return_array (bool, optional): Fast path for e.g. optimization
+            loops. Return the annuities as a NumPy array, in the same order
+            as the Series. The Series and ``df_VSE`` with the details are
+            not created, so the attributes ``A`` and ``df_VSE`` of the
+            system are not updated. The results of the parts are stored.
 
         Returns:
             A (Pandas Series): Series of all annuities
@@ -561,39 +773,171 @@ class System():
         if r_all is not None:  # Overwrite all other r_* values at once
             if r_all >= 0:
                 r_K = r_B = r_I = r_all
+                if len(df_VSE) > 0:  # Keep caller's df unchanged
+                    df_VSE = df_VSE.assign(r=r_all)
 
         # Calculate capital and operation annuities for all components (parts)
-        for _part in self.parts:
-            _part.calc_annuity_capital(T, q, r_K)  # calculate A_N_K
-            _part.calc_annuity_operation(T, q, r_B, r_I, price_op)  # A_N_B
-
-        # Get a DataFrame used to calculate the sums of the annuities
-        df_parts = self.list_parts()
-
-        # Create a Series of all annuities
-        self.A = pd.Series(dtype='float')
+        self._sync_parts()
+        self._calc_annuities_parts(T, q, r_K, r_B, r_I, price_op)
+
+        if return_array:
+            A = []
+            if A_N_K_name is not None:  # If None, skip output
+                A.append(self._array('A_N_K').sum())
+            if A_N_B_name is not None:  # If None, skip output
+                A.append(self._array('A_N_B').sum())
+            if len(df_VSE) > 0:
+                r = _get_VSE_r(df_VSE)
+                keys, sums = _calc_annuity_VSE_sums(T, q, r, df_VSE)
+                _check_VSE_keys(keys, A_N_K_name, A_N_B_name)
+                A.extend(sums)
+            return np.array(A)
+
+        # Collect all annuities, summed up from the part arrays
+        A = dict()
         if A_N_K_name is not None:  # If None, skip output
-            self.A[A_N_K_name] = df_parts['A_N_K'].sum()
+            A[A_N_K_name] = self._array('A_N_K').sum()
         if A_N_B_name is not None:  # If None, skip output
-            self.A[A_N_B_name] = df_parts['A_N_B'].sum()
+            A[A_N_B_name] = self._array('A_N_B').sum()
 
-        if r_all is not None:  # Overwrite all other r_* values at once
-            if r_all >= 0:
-                df_VSE['r'] = r_all
+        # Annuity factor (a = 1 for T <= 0), shared by all cost entries
+        a = calc_annuity_factor(T, q)
 
         # Calculate demand, "other costs" and proceeds for the whole system
         if len(df_VSE) > 0:
-            self.df_VSE = self.calc_annuity_cost_template(T, q, df_VSE)
-            df_VSE_grouped = self.df_VSE['product'].groupby(level=[0]).sum()
-            self.A = pd.concat([self.A, df_VSE_grouped])
+            df_VSE = self.calc_annuity_cost_template(T, q, df_VSE, a=a)
+            # Sum up the annuities grouped by index level 0 (sorted)
+            keys, sums = _sum_VSE(df_VSE.index, df_VSE['product'].to_numpy())
+            _check_VSE_keys(keys, A_N_K_name, A_N_B_name)
+            A.update(zip(keys, sums))
+            self.df_VSE = df_VSE
+        else:  # Do not keep the results of a previous call
+            self.df_VSE = pd.DataFrame()
+
+        # Create the Series of all annuities at once
+        self.A = pd.Series(A, dtype='float64')
 
         self.T = T
         self.q = q
+        self.a = a  # Reused e.g. by calc_NPV()
         self.A_N_K_name = A_N_K_name
         self.A_N_B_name = A_N_B_name
         return self.A
 
-    def calc_annuity_cost_template(self, T, q, df):
+    def _calc_annuities_parts(self, T, q, r_K, r_B, r_I, price_op):
+        """Calculate capital and operation annuities for all parts at once.
+
+        This is a vectorized version of ``Part.calc_annuity_capital()`` and
+        ``Part.calc_annuity_operation()``, operating on the struct-of-arrays
+        maintained by ``add_part()``. The sum of the cash values of all
+        procured replacements is a geometric series and is computed with
+        its closed form. The results are stored in the ``Part`` objects.
+
+        Args:
+            See ``calc_annuities()`` for arguments.
+
+        Returns:
+            None
+        """
+        A_0 = self._array('A_0')
+        T_N = self._array('T_N')
+
+        if T > 0:  # Official VDI calculation: Same factors for all parts
+            a = calc_annuity_factor(T, q)  # annuity factor
+            # price dynamic cash value factors for operation and maintenance
+            b_B = calc_cash_value_factor(T, r_B, q)
+            b_IN = calc_cash_value_factor(T, r_I, q)
+
+        else:  # Calc without observation period (Not part of VDI 2067!)
+            T = T_N  # Calculate each part with its own service life time
+            a = _annuity_factor_array(T, q)
+            b_B = _cash_value_factor_array(T, r_B, q)
+            b_IN = _cash_value_factor_array(T, r_I, q)
+
+        n, R_W, A_N_K = _capital_annuity_array(A_0, T_N, T, q, r_K,
+                                               self._array('fund'), a)
+
+        # operation-related costs in first year for maintenance
+        A_IN = A_0 * (self._array('f_Inst') + self._array('f_W_Insp'))
+        # operation-related costs in first year for actual operation
+        A_B1 = self._array('f_Op') * price_op
+        # annuity of the operation-related costs with negative sign applied
+        A_N_B = (A_B1 * a * b_B + A_IN * a * b_IN) * (-1)
+
+        # Store the results in the arrays, which the parts read them from
+        for field, values in zip(_RESULT_FIELDS + _FACTOR_FIELDS,
+                                 (n, R_W, A_N_K, A_N_B, q, r_K)):
+            self._array(field)[:] = values
+        self._df_results_stale = True  # Update list_parts() when needed
+
+    def calc_annuities_batch(self, T=30, q=1.07, r_K=1.03, r_B=1.02,
+                             r_I=1.03, price_op=30, df_VSE=None,
+                             A_N_K_name='Capital-related costs',
+                             A_N_B_name='Operation-related costs',
+                             ):
+        """Calculate the annuities for many scenarios at once.
+
+        This is meant for sensitivity analysis and parameter sweeps. Each
+        of the arguments ``T``, ``q``, ``r_*`` and ``price_op`` can be a
+        single value or an array with one entry per scenario. All arrays
+        are broadcast against each other and the annuities of all parts
+        and scenarios are calculated in one vectorized pass.
+
+        Unlike ``calc_annuities()``, this does not store the results in the
+        energy system or its parts.
+
+        Args:
+            See ``calc_annuities()`` for arguments. ``df_VSE`` is optional
+            and is not modified.
+
+        Returns:
+            df (DataFrame): Annuities with one row per scenario and one
+            column per cost type, summed up like in ``calc_annuities()``
+        """
+        T, q, r_K, r_B, r_I, price_op = np.broadcast_arrays(
+            *[np.atleast_1d(np.asarray(arg, dtype=float))
+              for arg in (T, q, r_K, r_B, r_I, price_op)])
+
+        # Parts along axis 0, scenarios along axis 1
+        self._sync_parts()
+        A_0 = self._array('A_0')[:, np.newaxis]
+        T_N = self._array('T_N')[:, np.newaxis]
+        # Calc without observation period (Not part of VDI 2067!):
+        # Calculate each part with its own service life time
+        T_parts = np.where(T > 0, T, T_N)
+
+        a = _annuity_factor_array(T_parts, q)  # annuity factor
+        # price dynamic cash value factors for operation and maintenance
+        b_B = _cash_value_factor_array(T_parts, r_B, q)
+        b_IN = _cash_value_factor_array(T_parts, r_I, q)
+
+        fund = self._array('fund')[:, np.newaxis]
+        n, R_W, A_N_K = _capital_annuity_array(A_0, T_N, T_parts, q, r_K,
+                                               fund, a)
+
+        f_IN = self._array('f_Inst') + self._array('f_W_Insp')
+        A_IN = A_0 * f_IN[:, np.newaxis]
+        A_B1 = self._array('f_Op')[:, np.newaxis] * price_op
+        A_N_B = (A_B1 * a * b_B + A_IN * a * b_IN) * (-1)
+
+        A = dict()
+        if A_N_K_name is not None:  # If None, skip output
+            A[A_N_K_name] = A_N_K.sum(axis=0)
+        if A_N_B_name is not None:  # If None, skip output
+            A[A_N_B_name] = A_N_B.sum(axis=0)
+
+        # Demand, "other costs" and proceeds for the whole system
+        if df_VSE is not None and len(df_VSE) > 0:
+            r = _get_VSE_r(df_VSE)
+            keys, sums = _calc_annuity_VSE_sums(T, q, r, df_VSE)
+            _check_VSE_keys(keys, A_N_K_name, A_N_B_name)
+            A.update(zip(keys, sums))
+
+        df = pd.DataFrame(A)
+        df.index.name = 'Scenario'
+        return df
+
+    def calc_annuity_cost_template(self, T, q, df, a=None):
         """Calculate annuity of various costs types with the same template.
 
         Covers the following parts of the VDI, since they all use
@@ -616,36 +960,29 @@ class System():
             required column is ``r``, containing the price change
             factor for each entry.
 
+            a (float, optional): Precomputed annuity factor for ``T`` and
+            ``q``. Calculated if ``None``.
+
         Returns:
-            df (DataFrame): Results with annuities stored in column 'product'
+            df (DataFrame): Results with annuities stored in column 'product'.
+            This is a copy, the given DataFrame is not modified.
         """
-        try:
-            df_r = df.pop('r')  # Remove r here to allow use of df.prod()
-        except KeyError as ex:
-            raise KeyError('The given DataFrame is missing a column "r" '
-                           'with the price change factor for each entry'
-                           ) from ex
-        if df_r.hasnans:
-            raise ValueError('The column "r" of the given DataFrame has '
-                             'missing values. Make sure to set the price '
-                             'change factor "r" for all entries')
-        for idx in df.index:
-            r = df_r.loc[idx]
-
+        if a is None:
             if T > 0:  # Official VDI calculation
                 a = calc_annuity_factor(T, q)  # annuity factor
-                b = calc_cash_value_factor(T, r, q)  # price-dynamic cash value
-
             else:  # Calculate without observation period (Not part of VDI!)
-                a = b = 1
-
-            df.loc[idx, 'a'] = a  # store annuity factor
-            df.loc[idx, 'b'] = b  # store cash value factor
-            # Annuity: multiply columns row-wise
-            df.loc[idx, 'product'] = df.loc[idx].prod()
-            # Fill in other used values
-            df.loc[idx, 'T'] = T  # store observation period
-            df.loc[idx, 'q'] = q  # store interest factor
+                a = 1
+        a, b, product = _calc_annuity_VSE(T, q, _get_VSE_r(df), df, a=a)
+
+        df = df.copy()  # Do not add the result columns to the caller's df
+        df_r = df.pop('r')  # Moved to the end below
+        df['a'] = float(a)  # store annuity factor
+        df['b'] = b  # store cash value factor
+        # Annuity: product of the given columns and the factors
+        df['product'] = product
+        # Fill in other used values
+        df['T'] = float(T)  # store observation period
+        df['q'] = q  # store interest factor
 
         df['r'] = df_r  # restore column with price change factor
 
@@ -703,11 +1040,10 @@ class System():
                       'on invest')
 
         # Just for reference, an implementation of the alternative formula:
-        # a = calc_annuity_factor(self.T, self.q)
-        # total_invest = self.A[self.A_N_K_name] * 1/a * (-1)
+        # total_invest = self.A[self.A_N_K_name] * 1/self.a * (-1)
         # return_on_invest = 0
         # for i in range(1, int(self.T)+1):
-        #      r = (self.A.sum() - self.A[self.A_N_K_name]) / pow(self.q, i)
+        #      r = (self.A.sum() - self.A[self.A_N_K_name]) / self.q**i
         #      return_on_invest += r/self.T  # build sum and calculate mean
         # t_amort_alt = total_invest / return_on_invest
         # print(t_amort, t_amort_alt, t_amort-t_amort_alt)
@@ -727,62 +1063,120 @@ class System():
             = \frac{A_N}{a}
         """
         A = self.A.sum()  # sum of annuities
-        a = calc_annuity_factor(self.T, self.q)
-        NPV = A / a
+        NPV = A / self.a  # annuity factor stored by calc_annuities()
         return NPV
 
     def pprint_parts(self):
         """Pretty print the parts of the energy system to the console."""
         df_parts = self.list_parts()  # Get DataFrame with all parts
+        if not self.verbose:  # Skip formatting the output
+            return df_parts
 
         A = self.calc_investment()
         A_funding = self.calc_investment(include_funding=True)
 
-        pd.set_option('display.precision', 2)  # Set number of decimal points
-        pd.set_option('display.float_format', self.f_space)
-        print('------------- List of parts -------------')
-        print(df_parts.to_string())
-        print('-----------------------------------------')
-        print('Total investment costs:   ', self.f_space(A))
-        if A != A_funding:
-            print('Investment after funding: ', self.f_space(A_funding))
-        print('-----------------------------------------')
-        pd.reset_option('display.precision')  # ...reset the setting from above
-        pd.reset_option('display.float_format')
+        # Set number of decimal points and format, only for this block
+        with pd.option_context('display.precision', 2,
+                               'display.float_format', _f_space):
+            print('------------- List of parts -------------')
+            print(df_parts.to_string())
+            print('-----------------------------------------')
+            print('Total investment costs:   ', _f_space(A))
+            if A != A_funding:
+                print('Investment after funding: ', _f_space(A_funding))
+            print('-----------------------------------------')
 
         return df_parts
 
     def pprint_annuities(self):
         """Pretty print the annuities to the console."""
-        pd.set_option('display.precision', 2)  # Set number of decimal points
-        pd.set_option('display.float_format', self.f_space)
-        print('--------------- Annuities ---------------')
-        print(self.A.to_string())
-        print('-----------------------------------------')
-        print('Total annuity:            ', self.f_space(self.A.sum()))
-        print('-----------------------------------------')
-        pd.reset_option('display.precision')  # ...reset the setting from above
-        pd.reset_option('display.float_format')
+        if not self.verbose:  # Skip formatting the output
+            return self.A
+
+        # Set number of decimal points and format, only for this block
+        with pd.option_context('display.precision', 2,
+                               'display.float_format', _f_space):
+            print('--------------- Annuities ---------------')
+            print(self.A.to_string())
+            print('-----------------------------------------')
+            print('Total annuity:            ', _f_space(self.A.sum()))
+            print('-----------------------------------------')
 
         return self.A
 
     def pprint_VSE(self):
         """Pretty-print operation, demand and other costs to the console."""
-        pd.set_option('display.precision', 2)  # Set number of decimal points
-        pd.set_option('display.float_format', self.f_space)
-        print('------------ Annuity details ------------')
-        if not self.df_VSE.empty:
-            print(self.df_VSE.to_string())
-        print('-----------------------------------------')
-        pd.reset_option('display.precision')  # ...reset the setting from above
-        pd.reset_option('display.float_format')
+        if not self.verbose:  # Skip formatting the output
+            return self.df_VSE
+
+        # Set number of decimal points and format, only for this block
+        with pd.option_context('display.precision', 2,
+                               'display.float_format', _f_space):
+            print('------------ Annuity details ------------')
+            if not self.df_VSE.empty:
+                print(self.df_VSE.to_string())
+            print('-----------------------------------------')
 
         return self.df_VSE
 
+    @staticmethod
+    def clear_caches():
+        """Clear the memoized results of all cached calculation functions.
+
+        The caches are bounded in size, so this is only required to free
+        memory, e.g. after a large parameter study.
+        """
+        calc_annuity_factor.cache_clear()
+        calc_cash_value_factor.cache_clear()
+        _capital_cached.cache_clear()
+        _read_cost_db.cache_clear()
+
     def f_space(self, x):
         """Format and return a float with space as thousands separator."""
-        locale.setlocale(locale.LC_ALL, '')
-        return locale.format_string('%14.2f', x, grouping=True)
+        return _f_space(x)
+
+
+class _PartField():
+    """Attribute of a ``Part``, which is shared with its ``System``.
+
+    A part that was added to a system is a view into the struct-of-arrays
+    of the system: Changes to its properties are written to the arrays and
+    its results are read from them. This way, the system can calculate all
+    parts at once, without looping over them. Parts that do not belong to
+    a system store their own values.
+    """
+
+    __slots__ = ('name', 'slot', 'from_array')
+
+    def __init__(self, name, from_array=False):
+        self.name = name  # Name of the attribute
+        self.slot = '_' + name  # Name of the slot storing the own value
+        self.from_array = from_array  # If true, read value from the system
+
+    def __get__(self, part, owner=None):
+        """Return the value of the attribute."""
+        if part is None:
+            return self
+        system = part._system
+        if self.from_array and system is not None:
+            value = float(system._data[self.name][part._index])
+            if math.isnan(value):  # Not calculated yet
+                return None
+            return int(value) if self.name == 'n' else value
+        return getattr(part, self.slot)
+
+    def __set__(self, part, value):
+        """Set the value of the attribute, also in the system."""
+        setattr(part, self.slot, value)
+        system = part._system
+        if system is not None:
+            if self.name in system._data:
+                system._data[self.name][part._index] = (
+                    np.nan if value is None else value)
+            if self.from_array:  # Update results in list_parts() when needed
+                system._df_results_stale = True
+            else:  # Mark the cached list of parts as dirty
+                system._df_parts = None
 
 
 class Part():
@@ -790,30 +1184,104 @@ class Part():
 
     Stores all properties of the component and can calculate its own
     capital-related costs and operation-related costs.
+
+    Once the part was added to a ``System``, its properties and results
+    are stored in the system. A part can only belong to one system.
     """
 
+    # Fixed set of attributes: Saves memory and speeds up attribute access
+    __slots__ = ('_system', '_index', '_name', '_size', '_unit',
+                 '_A_0', '_T_N', '_f_Inst', '_f_W_Insp', '_f_Op', '_fund',
+                 '_n', '_R_W', '_A_N_K', '_A_N_B', '_q', '_r_K')
+
+    name = _PartField('name')  # Name of the component
+    size = _PartField('size')  # Size of the part when loaded from database
+    unit = _PartField('unit')  # Unit corresponding to size
+    A_0 = _PartField('A_0')  # Investment amount [€]
+    T_N = _PartField('T_N')  # service life (in years)
+    f_Inst = _PartField('f_Inst')  # Effort for maintenance
+    f_W_Insp = _PartField('f_W_Insp')  # Effort for servicing and inspection
+    f_Op = _PartField('f_Op')  # Effort for operation [h/a]
+    fund = _PartField('fund')  # factor for funding
+
+    # Results, read from the arrays of the system (from_array=True)
+    # To be calculated by calc_annuity_capital()
+    n = _PartField('n', True)  # number of replacements
+    R_W = _PartField('R_W', True)  # residual value
+    A_N_K = _PartField('A_N_K', True)  # annuity of the capital-related costs
+    q = _PartField('q', True)  # interest factor used for A
+    r_K = _PartField('r_K', True)  # price change factor used for A
+
+    # To be calculated by calc_annuity_operation()
+    A_N_B = _PartField('A_N_B', True)  # annuity of operation-related costs
+
     def __init__(self, name, A_0, T_N, f_Inst, f_W_Insp, f_Op, fund=0,
                  size=None, unit=None):
-        self.name = name  # Name of the component
-        self.size = size  # Size of the part when loaded from database
-        self.unit = unit  # Unit corresponding to size
-        self.A_0 = A_0  # Investment amount [€]
-        self.T_N = T_N  # service life (in years)
-        self.f_Inst = f_Inst  # Effort for maintenance
-        self.f_W_Insp = f_W_Insp  # Effort for servicing and inspection
-        self.f_Op = f_Op  # Effort for operation [h/a]
-        self.fund = fund  # factor for funding
-
-        # To be calculated by calc_annuity_capital()
-        self.A = []  # list of cash values for all procured replacements
-        self.n = None  # number of replacements
-        self.R_W = None  # residual value
-        self.A_N_K = None  # annuity of the capital-related costs
-
-        # To be calculated by calc_annuity_operation()
-        self.A_N_B = None  # annuity of the operation-related costs
-
-    def calc_annuity_capital(self, T, q, r):
+        # Write the slots directly, the part does not belong to a system yet
+        self._system = None  # System the part belongs to; set by add_part()
+        self._index = None  # Index in the arrays of the system
+        self._name = name
+        self._size = size
+        self._unit = unit
+        self._A_0 = A_0
+        self._T_N = T_N
+        self._f_Inst = f_Inst
+        self._f_W_Insp = f_W_Insp
+        self._f_Op = f_Op
+        self._fund = fund
+        self._n = None
+        self._R_W = None
+        self._A_N_K = None
+        self._q = None
+        self._r_K = None
+        self._A_N_B = None
+
+    def _detach(self):
+        """Store the results of a removed part in the part itself."""
+        for field in _RESULT_FIELDS + _FACTOR_FIELDS:
+            setattr(self, '_' + field, getattr(self, field))
+        self._system = None
+        self._index = None
+
+    @property
+    def A(self):
+        """List of cash values for all procured replacements.
+
+        Calculated from the results of the capital-related costs, empty
+        before they were calculated. The first entry is reduced by the
+        factor for funding.
+        """
+        n = self.n
+        if n is None:
+            return []
+
+        A_0, T_N, r, q = self.A_0, self.T_N, self.r_K, self.q
+        A = [A_0 * r**(i*T_N) / q**(i*T_N) for i in range(n+1)]
+        if self.fund > 0:  # Not part of the original VDI 2067!
+            A[0] = A[0]*(1 - self.fund)
+        return A
+
+    def calc_annuities(self, T, q, r_K, r_B, r_I, price_op):
+        """Calculate annuities of capital- and operation-related costs.
+
+        Same as calling ``calc_annuity_capital()`` and
+        ``calc_annuity_operation()``, but the annuity factor is only
+        calculated once.
+
+        Args:
+            See ``System.calc_annuities()`` for arguments.
+
+        Returns:
+            None
+        """
+        if T <= 0:  # Calc without observation period (Not part of VDI 2067!)
+            T = self.T_N  # Calculate each part with its own service life time
+
+        a = calc_annuity_factor(T, q)  # annuity factor
+        self.calc_annuity_capital(T, q, r_K, a=a)
+        self.calc_annuity_operation(T, q, r_B, r_I, price_op, a=a)
+
+    def calc_annuity_capital(self, T, q, r, a=None):
         """Calculate annuity of capital-related costs.
 
         8.1.1 Capital-related costs (Kapitalgebundene Kosten)
@@ -837,6 +1305,9 @@ class Part():
 
             r (float): price change factor (Preisänderungsfaktor)
 
+            a (float, optional): Precomputed annuity factor for ``T`` and
+            ``q``. Calculated if ``None``.
+
         Returns:
             None
         """
@@ -844,47 +1315,21 @@ class Part():
             T = self.T_N  # Calculate each part with its own service life time
 
         # Calculation as defined in VDI 2067:
-        a = calc_annuity_factor(T, q)  # annuity factor
+        if a is None:
+            a = calc_annuity_factor(T, q)  # annuity factor
 
-        # number of replacements procured within the observation period
-        if self.T_N == 0:
-            n = 0  # for one-time expenses, like "planning"
-        else:
-            n = math.ceil(T/self.T_N) - 1
-        # print(T, self.T_N, n)
-
-        A = []  # list of cash values for all procured replacements
-        for i in range(0, n+1):
-            A_i = self.A_0 * (pow(r, i*self.T_N))/(pow(q, i*self.T_N))
-            A.append(A_i)
-
-        # residual value
-        if self.T_N == 0:
-            R_W = 0
-        else:
-            R_W = (self.A_0
-                   * pow(r, n*self.T_N)  # price at time of purchase
-                   * ((n+1)*self.T_N-T)/self.T_N  # straight-line depriciation
-                   * 1/pow(q, T)  # discounted to beginning (of review period)
-                   )
-
-        # The concept of funding is not part of the original VDI 2067!
-        if self.fund > 0:
-            # Investment amout of first year is reduced by factor for funding
-            A[0] = A[0]*(1 - self.fund)
-            # Note: The original investment 'self.A_0' is not changed, so as to
-            # not affect the calculation of operation-related costs
-
-        # annuity of the capital-related costs with negative sign applied
-        A_N_K = (sum(A) - R_W) * a * (-1)
+        n, R_W, A_N_K = _capital_cached(self.A_0, self.T_N, T, q, r,
+                                        self.fund, a)
 
         # Store values
-        self.A = A  # list of cash values for all procured replacements
         self.n = n  # number of replacements
         self.R_W = R_W  # residual value
         self.A_N_K = A_N_K  # annuity of the capital-related costs
+        self.q = q  # interest factor used for A
+        self.r_K = r  # price change factor used for A
 
-    def calc_annuity_operation(self, T, q, r_B, r_I, price_op):
+    def calc_annuity_operation(self, T, q, r_B, r_I, price_op, a=None,
+                               b_B=None, b_IN=None):
         """Calculate annuity of operation-related costs.
 
         8.1.3 Operation-related costs (Betriebsgebundene Kosten)
@@ -898,22 +1343,28 @@ class Part():
 
             price_op (float): price of operation [€/h]
 
+            a, b_B, b_IN (float, optional): Precomputed annuity factor and
+            price dynamic cash value factors. Calculated if ``None``.
+
         Returns:
             None
         """
         if T <= 0:  # Not part of VDI 2067!
             T = self.T_N  # Calculate each part with its own service life time
 
-        a = calc_annuity_factor(T, q)  # annuity factor
+        if a is None:
+            a = calc_annuity_factor(T, q)  # annuity factor
 
         # operation-related costs in first year for maintenance
         A_IN = self.A_0 * (self.f_Inst + self.f_W_Insp)
         # operation-related costs in first year for actual operation
         A_B1 = self.f_Op * price_op
-        # price dynamic cash value factor for operation-related costs
-        b_B = calc_cash_value_factor(T, r_B, q)
-        # price dynamic cash value factor for maintenance
-        b_IN = calc_cash_value_factor(T, r_I, q)
+        if b_B is None:
+            # price dynamic cash value factor for operation-related costs
+            b_B = calc_cash_value_factor(T, r_B, q)
+        if b_IN is None:
+            # price dynamic cash value factor for maintenance
+            b_IN = calc_cash_value_factor(T, r_I, q)
 
         # annuity of the operation-related costs with negative sign applied
         A_N_B = (A_B1 * a * b_B + A_IN * a * b_IN) * (-1)
@@ -922,6 +1373,89 @@ class Part():
         self.A_N_B = A_N_B
 
 
+def _capital_kernel(A_0, T_N, T, q, r, fund, a):
+    """Calculate the annuity of capital-related costs of a single part.
+
+    Numeric kernel of ``Part.calc_annuity_capital()``. The cash values of
+    the procured replacements form a geometric series with the common ratio
+    ``c = (r/q)**T_N``, so their sum is calculated in closed form instead
+    of with a loop.
+
+    Args:
+        A_0 (float): Investment amount [€]
+
+        T_N (int): service life (in years)
+
+        T (int): observation period (in years), must be ``T > 0``
+
+        q (float): interest factor (Zinsfaktor)
+
+        r (float): price change factor (Preisänderungsfaktor)
+
+        fund (float): Factor for funding of investment amount in first year
+
+        a (float): annuity factor
+
+    Returns:
+        n (int): number of replacements
+
+        R_W (float): residual value
+
+        A_N_K (float): annuity of the capital-related costs
+    """
+    # number of replacements procured within the observation period
+    if T_N == 0:
+        n = 0  # for one-time expenses, like "planning"
+    else:
+        n = int(-(-T // T_N)) - 1  # integer form of ceil(T/T_N) - 1
+
+    # Sum of the cash values of all procured replacements: Geometric
+    # series with common ratio c (parts with T_N == 0 have c == 1)
+    if T_N == 0 or r == q:
+        c_n = 1.0  # ratio of the last replacement, reused for residual value
+        A_sum = A_0 * (n+1)
+    elif r > 0:  # (c**(n+1)-1)/(c-1) with log(c), precise for r close to q
+        log_c = T_N * math.log1p((r-q)/q)
+        c_n = math.exp(n*log_c)
+        A_sum = A_0 * math.expm1((n+1)*log_c)/math.expm1(log_c)
+    else:
+        c = (r/q)**T_N
+        c_n = c**n
+        A_sum = A_0 * (1 - c_n*c)/(1 - c)
+
+    # The concept of funding is not part of the original VDI 2067!
+    # Investment amout of first year is reduced by factor for funding
+    A_sum -= A_0 * fund
+
+    # residual value
+    if T_N == 0:
+        R_W = 0.0
+    else:
+        R_W = (A_0
+               * c_n  # price at time of purchase, discounted to purchase
+               * ((n+1)*T_N-T)/T_N  # straight-line depriciation
+               * q**(n*T_N-T)  # discounted to beginning (of review period)
+               )
+
+    # annuity of the capital-related costs with negative sign applied
+    A_N_K = (A_sum - R_W) * a * (-1)
+    return n, R_W, A_N_K
+
+
+@functools.lru_cache(maxsize=4096)
+def _capital_cached(A_0, T_N, T, q, r, fund, a):
+    """Return the results of ``_capital_kernel()``, memoized.
+
+    In parameter studies, the same part is often calculated many times
+    with the same inputs. All arguments are hashable numbers. They are
+    converted to float, because equal int and float arguments share the
+    same cache entry, which must not depend on the type of the first call.
+    """
+    return _capital_kernel(float(A_0), T_N, float(T), float(q), float(r),
+                           float(fund), float(a))
+
+
+@functools.lru_cache(maxsize=1024)
 def calc_annuity_factor(T, q):
     """Calculate annuity factor ``a``.
 
@@ -939,18 +1473,21 @@ def calc_annuity_factor(T, q):
     if T <= 0:  # Not part of VDI 2067!
         return 1
 
+    if q <= 0:  # Only case where the denominator below could be invalid
+        raise ValueError('Cannot calculate annuity factor from observation'
+                         ' period T={} years and interest '
+                         'factor q={}'.format(T, q))
+
     if q == 1.0:  # Interest rate zero
         a = 1/T
     else:
-        try:
-            a = (q-1) / (1-pow(q, -T))  # annuity factor
-        except ZeroDivisionError as ex:
-            raise ValueError('Cannot calculate annuity factor from observation'
-                             ' period T={} years and interest '
-                             'factor q={}'.format(T, q)) from ex
+        # annuity factor (q-1)/(1-q**-T), with expm1() for precision
+        # when q is close to 1
+        a = (q-1) / -math.expm1(-T*math.log(q))
     return a
 
 
+@functools.lru_cache(maxsize=1024)
 def calc_cash_value_factor(T, r, q):
     """Calculate price-dynamic cash value factor ``b``.
 
@@ -972,11 +1509,229 @@ def calc_cash_value_factor(T, r, q):
 
     if r == q:
         b = T/q
+    elif r > 0:  # (1-(r/q)**T)/(q-r), precise when r is close to q
+        b = -math.expm1(T*math.log1p((r-q)/q))/(q-r)
     else:
-        b = (1 - pow(r/q, T))/(q-r)
+        b = (1 - (r/q)**T)/(q-r)
     return b
 
 
+def _capital_annuity_array(A_0, T_N, T, q, r, fund, a):
+    """Calculate the annuity of capital-related costs for arrays of parts.
+
+    Vectorized version of ``_capital_kernel()``. All arguments may be
+    NumPy arrays that are broadcast against each other, e.g. parts along
+    one axis and scenarios along another. ``T`` must be ``T > 0``, except
+    for parts with ``T_N == 0``.
+
+    Returns:
+        n (array): number of replacements
+
+        R_W (array): residual value
+
+        A_N_K (array): annuity of the capital-related costs
+    """
+    T_N_safe = np.where(T_N == 0, 1, T_N)  # Avoid division by zero
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # number of replacements procured within the observation period
+        # (n = 0 for one-time expenses, like "planning")
+        n = np.where(T_N == 0, 0, -(-T // T_N_safe) - 1).astype(int)
+
+        # Sum of cash values for all procured replacements: Geometric
+        # series with ratio x (parts with T_N == 0 have x == 1), with
+        # log(x) for precision when r is close to q
+        log_x = T_N * np.log1p((r-q)/q)
+        x = (r/q)**T_N
+        x_n = np.where(r > 0, np.exp(n*log_x), x**n)  # reused for R_W
+        A_sum = np.where(
+            (T_N == 0) | (r == q), A_0*(n+1),
+            np.where(r > 0, A_0*np.expm1((n+1)*log_x)/np.expm1(log_x),
+                     A_0*(1 - x_n*x)/(1 - x)))
+
+        # residual value
+        R_W = np.where(
+            T_N == 0, 0,
+            A_0
+            * x_n  # price at time of purchase, discounted to purchase
+            * ((n+1)*T_N - T)/T_N_safe  # straight-line depriciation
+            * q**(n*T_N - T)  # discounted to beginning (of review period)
+            )
+
+    # The concept of funding is not part of the original VDI 2067!
+    # Investment amout of first year is reduced by factor for funding
+    A_sum = A_sum - A_0*fund
+
+    # annuity of the capital-related costs with negative sign applied
+    A_N_K = (A_sum - R_W) * a * (-1)
+    return n, R_W, A_N_K
+
+
+@functools.lru_cache(maxsize=8)
+def _read_cost_db(path, sheet_regressions, mtime, cache):
+    """Read a sheet of the cost database, see ``System.load_cost_db()``.
+
+    The result is memoized, so that multiple ``System`` objects (e.g. in a
+    parameter study) share the same DataFrame instead of reading the file
+    again. The modification time ``mtime`` of the file is part of the key,
+    so a changed file is read again.
+    """
+    db = None
+    cache_path = '{}.{}.parquet'.format(path, sheet_regressions)
+    if (cache and os.path.isfile(cache_path)
+            and os.path.getmtime(cache_path) >= mtime):
+        try:
+            db = pd.read_parquet(cache_path)
+        except Exception as ex:  # e.g. pyarrow is not installed
+            logger.debug('Could not read cache %s: %s', cache_path, ex)
+
+    if db is None:
+        db = _read_excel_db(path, sheet_regressions)
+        if cache:
+            try:
+                db.to_parquet(cache_path)
+            except Exception as ex:  # e.g. read-only or pyarrow missing
+                logger.debug('Could not write cache %s: %s',
+                             cache_path, ex)
+
+    return db
+
+
+def _read_excel_db(path, sheet_regressions):
+    """Read a sheet of the cost database from an Excel file."""
+    return pd.read_excel(path, sheet_name=sheet_regressions,
+                         index_col=[0, 1, 2], header=0, engine=_EXCEL_ENGINE)
+
+
+def _f_space(x):
+    """Format and return a float with space as thousands separator."""
+    return f'{x:>14,.2f}'.replace(',', ' ')
+
+
+def _get_VSE_r(df_VSE):
+    """Return the checked column ``r`` of ``df_VSE`` as a NumPy array."""
+    try:
+        r = df_VSE['r'].to_numpy(dtype=float)
+    except KeyError as ex:
+        raise KeyError('The given DataFrame is missing a column "r" '
+                       'with the price change factor for each entry') from ex
+    if np.isnan(r).any():
+        raise ValueError('The column "r" of the given DataFrame has '
+                         'missing values. Make sure to set the price '
+                         'change factor "r" for all entries')
+    return r
+
+
+def _check_VSE_keys(keys, A_N_K_name, A_N_B_name):
+    """Raise an error if ``keys`` of ``df_VSE`` reuse an annuity name.
+
+    ``keys`` are the summed entries of index level 0 of ``df_VSE``, which
+    must not overwrite the annuities of the parts in the results.
+    """
+    duplicates = [name for name in (A_N_K_name, A_N_B_name)
+                  if name is not None and name in keys]
+    if duplicates:
+        raise ValueError('The index level 0 of the given DataFrame '
+                         'contains the names {} of the annuities of the '
+                         'parts. Choose different names with A_N_K_name '
+                         'and A_N_B_name'.format(duplicates))
+
+
+def _calc_annuity_VSE(T, q, r, df_VSE, a=None):
+    """Calculate the annuities of demand, other costs and proceeds.
+
+    Shared by ``System.calc_annuity_cost_template()`` and the NumPy paths
+    via ``_calc_annuity_VSE_sums()``. ``df_VSE`` is not modified. ``T``
+    and ``q`` may be arrays of scenarios, which are broadcast along axis 1
+    of the results.
+
+    Args:
+        r (array): price change factor for each row of ``df_VSE``
+
+        df_VSE (DataFrame): See ``System.calc_annuities()``
+
+        a (float, optional): Precomputed annuity factor for ``T`` and
+        ``q``. Calculated if ``None``.
+
+    Returns:
+        a (array): annuity factor
+
+        b (array): price-dynamic cash value factor for each row
+
+        product (array): annuity for each row
+    """
+    # Entries along axis 0, scenarios (if any) along axis 1
+    shape = (-1,) + (1,) * np.ndim(T)
+    r = r.reshape(shape)
+    # Multiply the given columns row-wise (e.g. quantity and price)
+    table = df_VSE.to_numpy(dtype=float)
+    values = np.prod(np.delete(table, df_VSE.columns.get_loc('r'), axis=1),
+                     axis=1).reshape(shape)
+    if a is None:
+        a = _annuity_factor_array(T, q)
+    b = _cash_value_factor_array(T, r, q)
+    return a, b, values * a * b
+
+
+def _sum_VSE(index, product):
+    """Sum up the annuities ``product`` grouped by level 0 of ``index``.
+
+    Returns:
+        keys (Index): Sorted entries of index level 0
+
+        sums (array): Summed annuities for each entry in ``keys``
+    """
+    codes, keys = pd.factorize(index.get_level_values(0), sort=True)
+    valid = codes >= 0  # Skip missing keys (code -1), like groupby()
+    sums = np.zeros((len(keys),) + product.shape[1:])
+    np.add.at(sums, codes[valid], product[valid])
+    return keys, sums
+
+
+def _calc_annuity_VSE_sums(T, q, r, df_VSE):
+    """Calculate the summed annuities of demand, other costs and proceeds.
+
+    NumPy version of ``System.calc_annuity_cost_template()`` followed by
+    grouping the results by index level 0 of ``df_VSE``, see
+    ``_calc_annuity_VSE()`` and ``_sum_VSE()``.
+
+    Returns:
+        keys (Index): Sorted entries of index level 0 of ``df_VSE``
+
+        sums (array): Summed annuities for each entry in ``keys``
+    """
+    product = _calc_annuity_VSE(T, q, r, df_VSE)[2]
+    return _sum_VSE(df_VSE.index, product)
+
+
+def _annuity_factor_array(T, q):
+    """Calculate annuity factor ``a`` for arrays of ``T`` and ``q``.
+
+    Vectorized version of ``calc_annuity_factor()``.
+    """
+    T = np.asarray(T, dtype=float)
+    if np.any((T > 0) & (np.asarray(q) <= 0)):  # Same as scalar version
+        raise ValueError('Cannot calculate annuity factor from interest '
+                         'factor q={}'.format(q))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = np.where(q == 1, 1/T,  # q == 1: Interest zero
+                     (q-1) / -np.expm1(-T*np.log(q)))
+    return np.where(T > 0, a, 1)  # Not part of VDI 2067!
+
+
+def _cash_value_factor_array(T, r, q):
+    """Calculate price-dynamic cash value factor ``b`` for arrays.
+
+    Vectorized version of ``calc_cash_value_factor()``.
+    """
+    T = np.asarray(T, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        b = np.where(r == q, T/q,
+                     np.where(r > 0, -np.expm1(T*np.log1p((r-q)/q))/(q-r),
+                              (1 - (r/q)**T)/(q-r)))
+    return np.where(T > 0, b, 1)  # Not part of VDI 2067!
+
+
 if __name__ == "__main__":
     # If this imported as a module, this part will be skipped.
     # If this script is executed directly, we call our main method from here.
@@ -15,13 +15,37 @@
 
 """Define tests to run during build process."""
 
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
+import pandas as pd
 import annuity
 
+DB_PATH = os.path.join(os.path.dirname(annuity.__file__), 'examples',
+                       'cost_database.xlsx')
+
 
 class TestMethods(unittest.TestCase):
     """Defines tests."""
 
+    def setUp(self):
+        """Create an energy system and demand-related costs for the tests."""
+        self.system = annuity.System()
+        self.system.add_part('oil boiler', 6045, 20, 0.01, 0.025, 10)
+        self.system.add_part('burner', 2000, 12, 0.12, 0, 0, fund=0.5)
+        self.system.add_part('planning', 500, 0, 0, 0, 0)
+        df_VSE = pd.DataFrame({'quantity': [14012, 417],
+                               'price': [-0.06, -0.20],
+                               'r': [1.03, 1.05]},
+                              index=['Wärme', 'Strom'])
+        self.df_VSE = pd.concat([df_VSE], keys=['Demand-related costs'])
+
     def test_example_1(self):
         """Test the calculated total annuity."""
         self.assertAlmostEqual(annuity.main_VDI_example(pprint=False),
@@ -32,6 +56,259 @@ class TestMethods(unittest.TestCase):
         self.assertAlmostEqual(annuity.main_database_example(pprint=False),
                                -8.4087763815)
 
+    def test_batch(self):
+        """Test batch calculation against calc_annuities()."""
+        Ts = [0, 20, 30]
+        qs = [1.07, 1.0, 1.03]
+        df = self.system.calc_annuities_batch(T=Ts, q=qs, df_VSE=self.df_VSE)
+        for i, (T, q) in enumerate(zip(Ts, qs)):
+            A = self.system.calc_annuities(T=T, q=q, df_VSE=self.df_VSE)
+            for key in A.index:
+                self.assertAlmostEqual(df.loc[i, key], A[key])
+
+    def test_return_array(self):
+        """Test the fast path of calc_annuities() against the Series."""
+        system = self.system
+        A = system.calc_annuities(df_VSE=self.df_VSE)
+        A_array = system.calc_annuities(df_VSE=self.df_VSE, return_array=True)
+        self.assertEqual(len(A), len(A_array))
+        for value, value_array in zip(A, A_array):
+            self.assertAlmostEqual(value, value_array)
+
+        with self.assertRaises(KeyError):
+            system.calc_annuities(df_VSE=self.df_VSE.drop(columns='r'),
+                                  return_array=True)
+        with self.assertRaises(ValueError):
+            system.calc_annuities(df_VSE=self.df_VSE.assign(r=float('nan')),
+                                  return_array=True)
+
+    def test_invalid_q(self):
+        """Test that an interest factor q <= 0 raises an error."""
+        for T in [0, 30]:
+            with self.assertRaises(ValueError):
+                self.system.calc_annuities(T=T, q=0.0)
+        with self.assertRaises(ValueError):
+            self.system.calc_annuities_batch(T=[0, 30], q=[1.07, 0.0])
+
+    def test_VSE_unchanged(self):
+        """Test that repeated calls do not modify the given df_VSE."""
+        system = self.system
+        df_VSE_orig = self.df_VSE.copy()
+
+        A_1 = system.calc_annuity(df_VSE=self.df_VSE)
+        system.calc_annuity(df_VSE=self.df_VSE, r_all=1.05)
+        A_2 = system.calc_annuity(df_VSE=self.df_VSE)
+        self.assertAlmostEqual(A_1, A_2)
+        pd.testing.assert_frame_equal(self.df_VSE, df_VSE_orig)
+
+    def test_VSE_missing_key(self):
+        """Test that entries without a cost type are skipped in the sums."""
+        index = pd.MultiIndex.from_tuples(
+            [('Demand', 'a'), (float('nan'), 'b'), ('Proceeds', 'c')])
+        df_VSE = pd.DataFrame({'quantity': [10, 20, 30],
+                               'price': [-1.0, 2.0, 3.0],
+                               'r': [1.03, 1.03, 1.03]}, index=index)
+        A = self.system.calc_annuities(df_VSE=df_VSE)
+        A_VSE = self.system.df_VSE['product'].groupby(level=0).sum()
+        A_array = self.system.calc_annuities(df_VSE=df_VSE, return_array=True)
+        df = self.system.calc_annuities_batch(df_VSE=df_VSE)
+        for key in ['Demand', 'Proceeds']:
+            self.assertAlmostEqual(A[key], A_VSE[key])
+            self.assertAlmostEqual(df.loc[0, key], A_VSE[key])
+        self.assertAlmostEqual(A_array[-1], A_VSE['Proceeds'])
+
+    def test_VSE_name_collision(self):
+        """Test that df_VSE cannot use the names of the part annuities."""
+        df_VSE = self.df_VSE.rename(
+            index={'Demand-related costs': 'Capital-related costs'})
+        with self.assertRaises(ValueError):
+            self.system.calc_annuities(df_VSE=df_VSE)
+        with self.assertRaises(ValueError):
+            self.system.calc_annuities(df_VSE=df_VSE, return_array=True)
+        with self.assertRaises(ValueError):
+            self.system.calc_annuities_batch(df_VSE=df_VSE)
+        A = self.system.calc_annuities(df_VSE=df_VSE, A_N_K_name='Capital')
+        self.assertEqual(list(A.index), ['Capital', 'Operation-related costs',
+                                         'Capital-related costs'])
+
+    def test_verbose(self):
+        """Test that the pprint_*() methods only print if verbose."""
+        for verbose in [True, False]:
+            system = annuity.System(verbose=verbose)
+            system.add_part('oil boiler', 6045, 20, 0.01, 0.025, 10)
+            A = system.calc_annuities(df_VSE=self.df_VSE)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                df_parts = system.pprint_parts()
+                pd.testing.assert_series_equal(system.pprint_annuities(), A)
+                system.pprint_VSE()
+            self.assertEqual(len(output.getvalue()) > 0, verbose)
+            pd.testing.assert_frame_equal(df_parts, system.list_parts())
+
+    def test_list_parts(self):
+        """Test that the cached list of parts is kept up to date."""
+        system = self.system
+        df_1 = system.list_parts()
+        system.add_part('pump', 286, 10, 0.03, 0, 0)
+        df_2 = system.list_parts()
+        self.assertEqual(len(df_1), 3)
+        self.assertEqual(len(df_2), 4)
+
+        system.calc_annuities()
+        df_3 = system.list_parts()
+        self.assertTrue(df_2['A_N_K'].isna().all())
+        self.assertEqual(df_3['A_N_K'].tolist(),
+                         [part.A_N_K for part in system.parts])
+
+        system.calc_annuities(q=1.03)
+        self.assertNotEqual(df_3['A_N_K'].tolist(),
+                            [part.A_N_K for part in system.parts])
+        self.assertEqual(system.list_parts()['A_N_K'].tolist(),
+                         [part.A_N_K for part in system.parts])
+
+    def test_part_calc_annuities(self):
+        """Test the annuities of single parts against the system."""
+        kwargs = dict(q=1.07, r_K=1.03, r_B=1.02, r_I=1.03, price_op=30)
+        for T in [0, 30]:
+            self.system.calc_annuities(T=T, **kwargs)
+            for part_system in self.system.parts:
+                part = annuity.Part(part_system.name, part_system.A_0,
+                                    part_system.T_N, part_system.f_Inst,
+                                    part_system.f_W_Insp, part_system.f_Op,
+                                    fund=part_system.fund)
+                part.calc_annuities(T=T, **kwargs)
+                self.assertEqual(part.n, part_system.n)
+                for field in ['R_W', 'A_N_K', 'A_N_B']:
+                    self.assertAlmostEqual(getattr(part, field),
+                                           getattr(part_system, field))
+
+    def test_add_parts_db(self):
+        """Test adding multiple parts from the database at once."""
+        records = [('Photovoltaik', 'Dach', 'komplett', 5500),
+                   ('Gebäude', 'Heizzentrale', 'komplett', 1, 0.2),
+                   ('Elektrolyse', 'PEM', 'Elektrolyseur', 0)]
+        system_1 = annuity.System()
+        system_1.load_cost_db(path=DB_PATH)
+        for record in records:
+            fund = record[4] if len(record) > 4 else 0.5
+            system_1.add_part_db(*record[:4], fund=fund)
+        system_2 = annuity.System()
+        system_2.load_cost_db(path=DB_PATH)
+        self.assertTrue(system_2.add_parts_db(records, fund=0.5))
+        pd.testing.assert_frame_equal(system_1.list_parts(),
+                                      system_2.list_parts())
+
+    def test_load_cost_db_file_like(self):
+        """Test loading the cost database from a file-like object."""
+        with open(DB_PATH, 'rb') as f:
+            db = annuity.System().load_cost_db(path=io.BytesIO(f.read()))
+        pd.testing.assert_frame_equal(
+            db, annuity.System().load_cost_db(path=DB_PATH))
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None,
+                     'pyarrow is not installed')
+    def test_load_cost_db_cache(self):
+        """Test the Parquet cache of the cost database."""
+        with tempfile.TemporaryDirectory() as folder:
+            path = shutil.copy(DB_PATH, folder)
+            cache_path = path + '.Regressionen.parquet'
+            db = annuity.System().load_cost_db(path=path)
+            self.assertFalse(os.path.exists(cache_path))
+
+            annuity.System.clear_caches()
+            annuity.System().load_cost_db(path=path, cache=True)
+            self.assertTrue(os.path.exists(cache_path))
+            annuity.System.clear_caches()
+            pd.testing.assert_frame_equal(
+                db, annuity.System().load_cost_db(path=path, cache=True))
+
+    def test_cost_db_replaced(self):
+        """Test that parts are added from a replaced cost database."""
+        system = annuity.System()
+        db = system.load_cost_db(path=DB_PATH)
+        system.add_part_db('Photovoltaik', 'Dach', 'komplett', 100)
+        system.cost_db = db.assign(**{'Reg. Faktor': db['Reg. Faktor']*2})
+        system.add_part_db('Photovoltaik', 'Dach', 'komplett', 100)
+        self.assertAlmostEqual(system.parts[1].A_0, 2*system.parts[0].A_0)
+
+    def test_cost_db_columns_changed(self):
+        """Test reloading the cost database with other column names."""
+        system = annuity.System()
+        system.load_cost_db(path=DB_PATH)
+        system.add_part_db('Photovoltaik', 'Dach', 'komplett', 100)
+        system.load_cost_db(path=DB_PATH, db_f_operation='Wartung')
+        system.add_part_db('Photovoltaik', 'Dach', 'komplett', 100)
+        self.assertEqual(system.parts[0].f_Op, 0)
+        self.assertEqual(system.parts[1].f_Op, system.parts[1].f_W_Insp)
+
+    def test_parts_changed(self):
+        """Test that direct changes to System.parts are used."""
+        system_1 = annuity.System()
+        system_1.add_part('oil boiler', 6045, 20, 0.01, 0.025, 10)
+        system_1.calc_annuities()
+        system_1.parts.append(annuity.Part('burner', 2000, 12, 0.12, 0, 0))
+        system_1.parts[0].A_0 = 5000
+
+        system_2 = annuity.System()
+        system_2.add_part('oil boiler', 5000, 20, 0.01, 0.025, 10)
+        system_2.add_part('burner', 2000, 12, 0.12, 0, 0)
+        pd.testing.assert_series_equal(system_1.calc_annuities(),
+                                       system_2.calc_annuities())
+        self.assertEqual(system_1.calc_investment(), 7000)
+        pd.testing.assert_frame_equal(system_1.list_parts(),
+                                      system_2.list_parts())
+
+        part = system_1.parts.pop(0)  # A removed part keeps its results
+        A_N_K = part.A_N_K
+        system_1.calc_annuities(q=1.03)
+        self.assertEqual(part.A_N_K, A_N_K)
+        system_2.parts.pop(0)
+        pd.testing.assert_series_equal(system_1.calc_annuities(q=1.03),
+                                       system_2.calc_annuities(q=1.03))
+
+    def test_part_A(self):
+        """Test the cash values of all procured replacements of a part."""
+        part = self.system.parts[1]  # burner with funding
+        self.assertEqual(part.A, [])
+        self.system.calc_annuities(T=30, q=1.07, r_K=1.03)
+        A = [2000 * (1.03/1.07)**(i*12) for i in range(3)]
+        A[0] *= 0.5
+        self.assertEqual(len(part.A), len(A))
+        for value, value_part in zip(A, part.A):
+            self.assertAlmostEqual(value, value_part)
+
+    def test_int_arguments(self):
+        """Test that int and float arguments give the same results."""
+        part = annuity.Part('burner', 2000, 12, 0.12, 0, 0)
+        part.calc_annuity_capital(T=30, q=2, r=1)
+        R_W_int = part.R_W
+        part.calc_annuity_capital(T=30.0, q=2.0, r=1.0)
+        self.assertGreater(R_W_int, 0)
+        self.assertEqual(R_W_int, part.R_W)
+
+    def test_negative_r(self):
+        """Test price change factors r <= 0 with the vectorized methods."""
+        kwargs = dict(q=1.07, r_K=-0.5, r_B=-0.5, r_I=-0.5, price_op=30)
+        A_batch = self.system.calc_annuities_batch(T=[0, 30], **kwargs)
+        for i, T in enumerate([0, 30]):
+            A = self.system.calc_annuities(T=T, **kwargs)
+            for part in self.system.parts:
+                part_ref = annuity.Part(part.name, part.A_0, part.T_N,
+                                        part.f_Inst, part.f_W_Insp,
+                                        part.f_Op, fund=part.fund)
+                part_ref.calc_annuities(T=T, **kwargs)
+                self.assertAlmostEqual(part.A_N_K, part_ref.A_N_K)
+                self.assertAlmostEqual(part.A_N_B, part_ref.A_N_B)
+            for value, value_batch in zip(A, A_batch.iloc[i]):
+                self.assertAlmostEqual(value, value_batch)
+
+    def test_no_pkg_resources(self):
+        """Test that importing annuity does not import pkg_resources."""
+        code = 'import sys, annuity; print("pkg_resources" in sys.modules)'
+        root = os.path.dirname(os.path.dirname(annuity.__file__))
+        result = subprocess.run([sys.executable, '-c', code], cwd=root,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.splitlines()[-1], 'False')
+
 
 if __name__ == '__main__':
     unittest.main()
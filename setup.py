@@ -30,8 +30,14 @@ setup(name='annuity',
       url='https://github.com/jnettels/annuity',
       python_requires='>=3.7',
       install_requires=[
+          'numpy',
           'pandas',
       ],
+      extras_require={
+          'parquet': ['pyarrow'],  # optional cache for the cost database
+          # optional fast Excel reader, supported by pandas >= 2.2
+          'calamine': ['python-calamine', 'pandas>=2.2'],
+      },
       packages=['annuity'],
       package_data={
         'annuity': ['examples/cost_database.xlsx'],